@@ -1,8 +1,15 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import plotly.graph_objects as go
 from datetime import datetime
+from flights import load_transport_data, create_flight_metrics
+import io
 import os
+import types
 from typing import Dict, Any
 import matplotlib.pyplot as plt
 
@@ -14,29 +21,107 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-@st.cache_data
+# Candidate column names probed against the CSV, declared once so helpers
+# don't re-allocate the tuples on every rerun
+MONTH_ORDER = ('January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December')
+DAY_ORDER = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+COST_COLUMNS = ('total price of stay', 'cost', 'price', 'amount', 'total_cost', 'expense')
+DATE_COLUMNS = ('check in', 'check out', 'date', 'departure_date', 'arrival_date', 'booking_date', 'travel_date')
+DESTINATION_COLUMNS = ('destination', 'city', 'country', 'location')
+TYPE_COLUMNS = ('platform', 'travel_type', 'type', 'category', 'mode')
+
+def resolve_columns(df: pd.DataFrame) -> Dict[str, Any]:
+    """Resolve the candidate column lists against the actual columns once,
+    so every helper can look the result up instead of rescanning"""
+    columns = set(df.columns)
+    return {
+        'cost': next((col for col in COST_COLUMNS if col in columns), None),
+        'date': next((col for col in DATE_COLUMNS if col in columns), None),
+        'destination': next((col for col in DESTINATION_COLUMNS if col in columns), None),
+        'type': next((col for col in TYPE_COLUMNS if col in columns), None),
+    }
+
+@st.cache_resource
+def _parse_accommodation_data(path: str, mtime: float) -> pd.DataFrame:
+    """Parse the accommodation CSV once per file version.
+
+    cache_resource hands back the same in-memory DataFrame on every rerun
+    (no pickle roundtrip like cache_data), and the mtime key invalidates
+    the cache only when the CSV actually changes. A Parquet sidecar is
+    written after the first parse and preferred while it is newer than
+    the CSV, skipping the cleanup pipeline entirely on cold starts.
+    """
+    sidecar = os.path.splitext(path)[0] + '.parquet'
+    if os.path.exists(sidecar) and os.path.getmtime(sidecar) >= mtime:
+        return pd.read_parquet(sidecar)
+    # Multithreaded C++ CSV parser; the European decimal comma is handled
+    # by the parser itself so the cost column materializes as float64
+    # directly ('average' is pinned to string to keep its raw formatting)
+    convert_options = pacsv.ConvertOptions(
+        column_types={
+            'id': pa.int32(),
+            'nights': pa.int16(),
+            'person': pa.int8(),
+            'check in': pa.string(),
+            'check out': pa.string(),
+            'total price of stay': pa.float64(),
+            'average': pa.string(),
+        },
+        decimal_point=',',
+    )
+    table = pacsv.read_csv(path, convert_options=convert_options)
+    # Convert date columns to datetime
+    date_columns = ['check in', 'check out']
+    for col in date_columns:
+        if col in table.column_names:
+            idx = table.schema.get_field_index(col)
+            parsed = pc.strptime(table[col], format='%d.%m.%Y', unit='s', error_is_null=True)
+            table = table.set_column(idx, col, parsed)
+    df = table.to_pandas()
+    # Shrink dtypes: low-cardinality strings become categoricals (isin,
+    # nunique and groupby then work on small integer codes). The cost
+    # column stays float64 - float32 representation noise leaks into the
+    # displayed totals and the saving at this row count is nil
+    for col in ('country', 'location', 'platform', 'accommodation'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    # Combined destination column, built per unique (location, country)
+    # pair and scattered back through codes - one label allocation per
+    # pair instead of a Python string concat per row
+    if 'country' in df.columns and 'location' in df.columns:
+        loc_cats = df['location'].cat.categories
+        cty_cats = df['country'].cat.categories
+        loc_codes = df['location'].cat.codes.to_numpy().astype(np.intp)
+        cty_codes = df['country'].cat.codes.to_numpy().astype(np.intp)
+        n_cty = len(cty_cats) + 1  # +1 leaves room for the NaN code (-1)
+        pair_keys = (loc_codes + 1) * n_cty + (cty_codes + 1)
+        uniq_keys, dest_codes = np.unique(pair_keys, return_inverse=True)
+        labels = [
+            f"{loc_cats[key // n_cty - 1] if key >= n_cty else 'nan'}, "
+            f"{cty_cats[key % n_cty - 1] if key % n_cty else 'nan'}"
+            for key in uniq_keys
+        ]
+        df['destination'] = pd.Categorical.from_codes(dest_codes, categories=labels)
+    # Booking-pattern helpers, computed once here as ordered categoricals so
+    # the patterns charts don't rebuild string Series (or reindex) per rerun
+    if 'check in' in df.columns:
+        month_codes = (df['check in'].dt.month - 1).fillna(-1).astype(int)
+        df['_month'] = pd.Categorical.from_codes(month_codes, categories=MONTH_ORDER, ordered=True)
+        dow_codes = df['check in'].dt.dayofweek.fillna(-1).astype(int)
+        df['_dow'] = pd.Categorical.from_codes(dow_codes, categories=DAY_ORDER, ordered=True)
+    try:
+        df.to_parquet(sidecar)
+    except Exception:
+        pass  # the sidecar is only a speed-up; the parsed frame is still good
+    return df
+
 def load_data() -> pd.DataFrame:
     """Load and cache the accommodation data"""
     try:
         if os.path.exists("travel_data.csv"):
-            df = pd.read_csv("travel_data.csv")
-            # Handle European number format in cost column
-            if 'total price of stay' in df.columns:
-                df['total price of stay'] = (
-                    df['total price of stay'].astype(str)
-                    .str.replace(' ', '')
-                    .str.replace(',', '.')
-                    .astype(float)
-                )
-            # Convert date columns to datetime
-            date_columns = ['check in', 'check out']
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], format='%d.%m.%Y', errors='coerce')
-            # Create combined destination column
-            if 'country' in df.columns and 'location' in df.columns:
-                df['destination'] = df['location'].astype(str) + ', ' + df['country'].astype(str)
-            return df
+            return _parse_accommodation_data("travel_data.csv", os.path.getmtime("travel_data.csv"))
         else:
             st.error("travel_data.csv file not found in the project directory.")
             return pd.DataFrame()
@@ -44,93 +129,111 @@ def load_data() -> pd.DataFrame:
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
-def load_transport_data() -> pd.DataFrame:
-    """Load and cache transport data from CSV"""
-    try:
-        df = pd.read_csv("data_transport.csv")
-        # Clean price column (spaces + commas)
-        if 'price per person ( EUR )' in df.columns:
-            df['price per person ( EUR )'] = (
-                df['price per person ( EUR )']
-                .astype(str)
-                .str.replace(" ", "")
-                .str.replace(",", ".")
-                .astype(float)
-            )
-        # Convert date
-        if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        return df
-    except Exception as e:
-        st.error(f"Error loading transport data: {str(e)}")
-        return pd.DataFrame()
+@st.cache_data(show_spinner=False)
+def filter_frame(df: pd.DataFrame, date_col, start_date, end_date, countries: tuple) -> pd.DataFrame:
+    """Apply the sidebar date/country filters; cached per selection so
+    toggling back to an earlier filter state reuses the filtered frame"""
+    mask = None
+    if date_col is not None and start_date is not None:
+        # Compare raw datetime64 values; .dt.date would build a
+        # Python date object per row just to throw it away
+        values = df[date_col].to_numpy()
+        start = np.datetime64(start_date)
+        end = np.datetime64(end_date) + np.timedelta64(1, 'D')
+        mask = (values >= start) & (values < end)
+    if countries:
+        country_mask = cat_isin(df['country'], countries)
+        mask = country_mask if mask is None else (mask & country_mask)
+    return df if mask is None else df[mask]
+
+def cat_isin(series: pd.Series, values) -> np.ndarray:
+    """Boolean row mask for membership tests on categorical columns.
+
+    Hashes only the small selection list against the categories, then
+    answers per row with integer indexing on the codes instead of
+    hashing every row's string. Falls back to Series.isin for
+    non-categorical input.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.isin(list(values)).to_numpy()
+    cats = series.cat.categories
+    idx = cats.get_indexer(list(values))
+    bmask = np.zeros(len(cats) + 1, dtype=bool)
+    bmask[idx[idx >= 0]] = True
+    # NaN rows have code -1 and land on the always-False last slot
+    return bmask[series.cat.codes.to_numpy()]
+
+@st.cache_data(show_spinner=False)
+def _unique_options(df: pd.DataFrame, col: str) -> list:
+    """Sorted option list for a sidebar filter, cached per data version
+    so unrelated widget changes don't rescan the column"""
+    series = df[col]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Categories are already deduplicated; only drop the unobserved ones
+        codes = series.cat.codes.to_numpy()
+        observed = np.unique(codes[codes >= 0])
+        return sorted(series.cat.categories.take(observed))
+    return sorted(series.dropna().unique())
 
-def create_summary_metrics(df: pd.DataFrame) -> Dict[str, Any]:
-    """Create summary statistics for the dashboard"""
+@st.cache_data
+def prepare_csv_download(df: pd.DataFrame) -> bytes:
+    """Serialize the filtered frame to gzipped CSV bytes, cached per filter state"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, compression={'method': 'gzip', 'compresslevel': 1})
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False)
+def create_summary_metrics(df: pd.DataFrame, resolved: Dict[str, Any]) -> Dict[str, Any]:
+    """Create summary statistics for the dashboard; cached per filter state"""
     if df.empty:
         return {}
     metrics = {}
-    # Days on the Road
+    # Days on the Road: NaT-skipping reductions straight on the
+    # datetime64 arrays, no intermediate dropna() frame
     if 'check in' in df.columns and 'check out' in df.columns:
-        df_dates = df.dropna(subset=['check in', 'check out'])
-        if not df_dates.empty:
-            first_day = df_dates['check in'].min()
-            last_day = df_dates['check out'].max()
-            if pd.notna(first_day) and pd.notna(last_day):
-                metrics['days_on_road'] = (last_day - first_day).days + 1
-    # Basic metrics
-    metrics['unique_places_stayed'] = df['accommodation'].nunique()
+        check_in = df['check in'].to_numpy('datetime64[ns]')
+        check_out = df['check out'].to_numpy('datetime64[ns]')
+        if not np.all(np.isnat(check_in)) and not np.all(np.isnat(check_out)):
+            first_day = np.nanmin(check_in)
+            last_day = np.nanmax(check_out)
+            days = (last_day - first_day).astype('timedelta64[D]').astype(int)
+            metrics['days_on_road'] = days + 1
+    # Basic, cost and destination metrics as one agg dispatch instead of
+    # a separate full-column scan per metric
+    cost_col = resolved['cost']
+    dest_col = resolved['destination']
+    agg_spec = {'accommodation': 'nunique'}
     if 'country' in df.columns:
-        metrics['visited_countries'] = df['country'].nunique()
-    # Cost metrics
-    cost_columns = ['total price of stay', 'cost', 'price', 'amount', 'total_cost', 'expense']
-    cost_col = next((col for col in cost_columns if col in df.columns), None)
+        agg_spec['country'] = 'nunique'
     if cost_col:
-        metrics['total_cost of accommodation'] = df[cost_col].sum()
-        avg_cost = round(df[cost_col].sum() / 2 / metrics.get('days_on_road', 1), 2)
+        agg_spec[cost_col] = 'sum'
+    if dest_col:
+        agg_spec[dest_col] = 'nunique'
+    stats = df.agg(agg_spec)
+    metrics['unique_places_stayed'] = int(stats['accommodation'])
+    if 'country' in df.columns:
+        metrics['visited_countries'] = int(stats['country'])
+    if cost_col:
+        metrics['total_cost of accommodation'] = stats[cost_col]
+        avg_cost = round(stats[cost_col] / 2 / metrics.get('days_on_road', 1), 2)
         metrics['average per person per night'] = f'€ {avg_cost}'
-    # Destination metrics
-    destination_columns = ['destination', 'city', 'country', 'location']
-    dest_col = next((col for col in destination_columns if col in df.columns), None)
     if dest_col:
-        metrics['unique_destinations'] = df[dest_col].nunique()
-        metrics['top_destination'] = df[dest_col].value_counts().index[0] if not df[dest_col].value_counts().empty else "N/A"
-    # Platform metrics
-    type_columns = ['platform', 'travel_type', 'type', 'category', 'mode']
-    type_col = next((col for col in type_columns if col in df.columns), None)
+        metrics['unique_destinations'] = int(stats[dest_col])
+        # Unsorted counts plus a single idxmax pass; no need to rank every
+        # destination just to read off the top one
+        dest_counts = df[dest_col].value_counts(sort=False)
+        metrics['top_destination'] = dest_counts.idxmax() if len(dest_counts) else "N/A"
+    # Platform metrics: isin() is a C-level compare, no per-row lowercasing
+    type_col = resolved['type']
     if type_col and 'accommodation' in df.columns:
-        metrics['workaway_projects'] = df[df[type_col].str.lower() == 'workaway']['accommodation'].nunique()
+        workaway_mask = df[type_col].isin(('workaway', 'Workaway', 'WORKAWAY'))
+        metrics['workaway_projects'] = df.loc[workaway_mask, 'accommodation'].nunique()
     return metrics
 
-def create_flight_metrics(df: pd.DataFrame) -> None:
-    """Show flight-related metrics"""
-    if df.empty:
-        st.warning("No transport data available.")
-        return
-    # Filter flights
-    flight_df = df[df['type of transport'].str.lower() == "flight"]
-    if flight_df.empty:
-        st.info("No flight records found in transport data.")
-        return
-    # Metric: total flights
-    st.metric("✈️ Flight Tickets", len(flight_df))
-    # Table: flights from-to-price
-    st.write("### ✈️ Flight Details")
-    st.dataframe(
-        flight_df[['from', 'to', 'price per person ( EUR )']].copy().reset_index(drop=True),
-        use_container_width=True
-    )
-    # Total price
-    total_price = flight_df['price per person ( EUR )'].sum()
-    st.subheader(f"💶 Total Flight Cost: € {total_price:,.2f}")
-
-def create_world_map(df: pd.DataFrame) -> None:
-    """Creates a world map of visited countries"""
-    if 'country' not in df.columns:
-        st.warning("No 'country' column found in the dataset to create a map.")
-        return
-    country_to_iso = {
+# Country name -> ISO alpha-3 code, built once at import time so Streamlit
+# reruns don't pay for rebuilding the dict on every render; frozen so no
+# helper can mutate the shared mapping between reruns
+COUNTRY_TO_ISO = types.MappingProxyType({
         'Afghanistan': 'AFG', 'Albania': 'ALB', 'Algeria': 'DZA', 'Andorra': 'AND', 'Angola': 'AGO',
         'Antigua and Barbuda': 'ATG', 'Argentina': 'ARG', 'Armenia': 'ARM', 'Australia': 'AUS',
         'austria': 'AUT', 'Azerbaijan': 'AZE', 'Bahamas': 'BHS', 'Bahrain': 'BHR', 'Bangladesh': 'BGD',
@@ -174,13 +277,44 @@ def create_world_map(df: pd.DataFrame) -> None:
         'United Kingdom': 'GBR', 'United States': 'USA', 'USA': 'USA', 'Uruguay': 'URY',
         'Uzbekistan': 'UZB', 'Vanuatu': 'VUT', 'Vatican City': 'VAT', 'Venezuela': 'VEN',
         'Vietnam': 'VNM', 'Yemen': 'YEM', 'Zambia': 'ZMB', 'Zimbabwe': 'ZWE'
-    }
-    df_countries = df.dropna(subset=['country']).copy()
-    df_countries['iso_alpha'] = df_countries['country'].map(country_to_iso)
-    df_countries = df_countries.dropna(subset=['iso_alpha']).drop_duplicates(subset=['iso_alpha'])
+    })
+
+# Case-insensitive lookup so mixed-case country names in the CSV still resolve
+_COUNTRY_TO_ISO_LOWER = {name.casefold(): iso for name, iso in COUNTRY_TO_ISO.items()}
+
+def create_world_map(df: pd.DataFrame) -> None:
+    """Creates a world map of visited countries"""
+    if 'country' not in df.columns:
+        st.warning("No 'country' column found in the dataset to create a map.")
+        return
+    # The choropleth needs one row per visited country, so never touch the
+    # full frame: collect the observed category codes, take their names
+    # and resolve ISO codes for just that handful of unique values
+    cats = df['country'].dropna().astype('category')
+    observed = np.unique(cats.cat.codes.to_numpy())
+    names = cats.cat.categories.take(observed[observed >= 0])
+    iso = np.array(
+        [_COUNTRY_TO_ISO_LOWER.get(str(name).casefold()) for name in names],
+        dtype=object
+    )
+    df_countries = pd.DataFrame({
+        'country': names.astype(str),
+        'iso_alpha': iso,
+    }).dropna(subset=['iso_alpha'])
     if df_countries.empty:
         st.warning("No valid countries found in the dataset for map visualization.")
         return
+    # Figure construction is the dominant cost here; rebuild only when the
+    # set of visited countries actually changed since the last rerun
+    map_key = hash(tuple(sorted(df_countries['iso_alpha'])))
+    if st.session_state.get('_world_map_key') != map_key:
+        st.session_state['_world_map_fig'] = _build_world_map_fig(df_countries)
+        st.session_state['_world_map_key'] = map_key
+    st.plotly_chart(st.session_state['_world_map_fig'], use_container_width=True)
+
+def _build_world_map_fig(df_countries: pd.DataFrame):
+    """Build the choropleth figure for the visited-countries map"""
+    import plotly.express as px  # deferred: only paid for when a map is drawn
     df_countries['is_visited'] = 'Visited'
     fig = px.choropleth(
         df_countries,
@@ -206,21 +340,67 @@ def create_world_map(df: pd.DataFrame) -> None:
         ),
         showlegend=False
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 def adjust_nights(df: pd.DataFrame) -> pd.DataFrame:
     """Adjust nights based on person column: halve nights if person is 1."""
-    df_adjusted = df.copy()
+    # Shallow copy: copy-on-write means adding the adjusted column below
+    # can't touch the caller's frame, so a deep copy is wasted work
+    df_adjusted = df.copy(deep=False)
     if 'person' in df_adjusted.columns:
-        df_adjusted['adjusted_nights'] = df_adjusted.apply(
-            lambda row: row['nights'] / 2 if pd.notna(row['person']) and row['person'] == 1 else row['nights'],
-            axis=1
-        )
+        # Vectorized: .eq(1) is already False for missing persons, so the
+        # old per-row notna/== lambda collapses to one np.where
+        nights = df_adjusted['nights'].to_numpy()
+        solo = df_adjusted['person'].eq(1).to_numpy()
+        df_adjusted['adjusted_nights'] = np.where(solo, nights / 2, nights)
     else:
         st.warning("Column 'person' not found. Using original nights without adjustment.")
         df_adjusted['adjusted_nights'] = df_adjusted['nights']
     return df_adjusted
 
+@st.cache_data(show_spinner=False)
+def _country_summary_table(df: pd.DataFrame, order_by: str) -> pd.DataFrame:
+    """Build the per-country summary table.
+
+    Cached on the (already filtered and cleaned) frame so toggling back to
+    a previously seen filter state reuses the aggregation instead of
+    redoing the groupby/merge pipeline.
+    """
+    df_adjusted = adjust_nights(df)
+    # Paid nights as a masked helper column lets one groupby produce all
+    # three sums; the old second filtered groupby plus merge go away
+    df_adjusted['paid_nights'] = np.where(
+        df_adjusted['total price of stay'].to_numpy() > 0,
+        df_adjusted['adjusted_nights'].to_numpy(dtype=float), 0.0
+    )
+    agg_spec = {'adjusted_nights': 'sum', 'total price of stay': 'sum', 'paid_nights': 'sum'}
+    if order_by == 'id':
+        agg_spec['id'] = 'first'
+    grouped_df = df_adjusted.groupby('country', sort=(order_by != 'id'), observed=True).agg(agg_spec).reset_index()
+    if order_by == 'id':
+        grouped_df = grouped_df.sort_values('id').drop('id', axis=1).reset_index(drop=True)
+    # Derive the averages as plain arrays and assemble the display frame
+    # in one constructor - no incremental column inserts to fragment it
+    nights_arr = grouped_df['adjusted_nights'].to_numpy(dtype=float)
+    total_cost = grouped_df['total price of stay'].to_numpy(dtype=float)
+    paid = grouped_df['paid_nights'].to_numpy(dtype=float)
+    # Masked divides so zero-night groups don't spray RuntimeWarnings
+    # into the log; they keep the NaN the old pandas division produced
+    average_cost = np.full_like(nights_arr, np.nan)
+    np.divide(total_cost, nights_arr * 2.0, out=average_cost, where=nights_arr > 0)
+    average_cost = np.round(average_cost, 2)
+    # Countries with no paid nights keep the 0 the old conditional produced
+    avg_paid = np.zeros_like(paid)
+    np.divide(total_cost, paid * 2.0, out=avg_paid, where=paid > 0)
+    return pd.DataFrame({
+        'Country': grouped_df['country'],
+        'Nights': nights_arr,
+        'Total Cost (€)': total_cost,
+        'Average Person/Night (€)': average_cost,
+        'Paid Nights': paid,
+        'Average Cost per Paid Night/Person (€)': np.round(avg_paid, 2),
+    })
+
 def create_country_summary(df: pd.DataFrame, order_by: str = 'id') -> None:
     """Group data by country and visualize total adjusted nights and total cost."""
     if df.empty:
@@ -233,13 +413,18 @@ def create_country_summary(df: pd.DataFrame, order_by: str = 'id') -> None:
     if missing_columns:
         st.error(f"Missing required columns: {', '.join(missing_columns)}")
         return
+    # The loader already emits numeric dtypes; only coerce a column if
+    # something upstream handed us strings, instead of re-allocating
+    # four float arrays per rerun
+    numeric_columns = ['nights', 'total price of stay']
+    if order_by == 'id':
+        numeric_columns.append('id')
+    if 'person' in df.columns:
+        numeric_columns.append('person')
     try:
-        df['nights'] = pd.to_numeric(df['nights'], errors='coerce')
-        df['total price of stay'] = pd.to_numeric(df['total price of stay'], errors='coerce')
-        if order_by == 'id':
-            df['id'] = pd.to_numeric(df['id'], errors='coerce')
-        if 'person' in df.columns:
-            df['person'] = pd.to_numeric(df['person'], errors='coerce')
+        for col in numeric_columns:
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
     except Exception as e:
         st.error(f"Error converting columns to numeric: {str(e)}")
         return
@@ -249,82 +434,72 @@ def create_country_summary(df: pd.DataFrame, order_by: str = 'id') -> None:
     if df.empty:
         st.error("No valid data remains after cleaning. Please check your CSV.")
         return
-    df_adjusted = adjust_nights(df)
-    if order_by == 'id':
-        grouped_df = df_adjusted.groupby('country').agg({
-            'adjusted_nights': 'sum',
-            'total price of stay': 'sum',
-            'id': 'first'
-        }).reset_index()
-        grouped_df = grouped_df.sort_values('id').drop('id', axis=1).reset_index(drop=True)
-    else:
-        grouped_df = df_adjusted.groupby('country').agg({
-            'adjusted_nights': 'sum',
-            'total price of stay': 'sum'
-        }).reset_index()
-    grouped_df['average_cost'] = grouped_df['total price of stay'] / grouped_df['adjusted_nights'] / 2
-    paid_nights = df_adjusted[df_adjusted['total price of stay'] > 0].groupby('country')['adjusted_nights'].sum().reset_index()
-    grouped_df = grouped_df.merge(paid_nights, on='country', how='left', suffixes=('', '_paid'))
-    grouped_df['adjusted_nights_paid'] = grouped_df['adjusted_nights_paid'].fillna(0)
-    grouped_df['avg_cost_paid_night_person'] = grouped_df.apply(
-        lambda row: row['total price of stay'] / row['adjusted_nights_paid'] / 2 if row['adjusted_nights_paid'] > 0 else 0,
-        axis=1
-    )
-    grouped_df.columns = ['Country', 'Nights', 'Total Cost (€)', 'Average Person/Night (€)', 'Paid Nights', 'Average Cost per Paid Night/Person (€)']
-    grouped_df['Average Person/Night (€)'] = grouped_df['Average Person/Night (€)'].round(2)
-    grouped_df['Average Cost per Paid Night/Person (€)'] = grouped_df['Average Cost per Paid Night/Person (€)'].round(2)
+    grouped_df = _country_summary_table(df, order_by)
     st.write("### Summary by Country")
     st.dataframe(grouped_df, use_container_width=True)
     col1, col2 = st.columns(2)
+    # go.Bar on the aggregated arrays skips the px trace-building layer;
+    # colors reproduce px's per-country qualitative palette
+    import plotly.express as px  # deferred: only the qualitative palette is needed
+    palette = px.colors.qualitative.Plotly
+    bar_colors = [palette[i % len(palette)] for i in range(len(grouped_df))]
+    countries_x = grouped_df['Country'].to_numpy()
     with col1:
-        fig_nights = px.bar(
-            grouped_df,
-            x='Country',
-            y='Nights',
-            title='Nights by Country',
-            labels={'Nights': 'Number of Nights'},
-            color='Country'
-        )
-        fig_nights.update_layout(showlegend=False)
+        fig_nights = go.Figure(go.Bar(
+            x=countries_x,
+            y=grouped_df['Nights'].to_numpy(),
+            marker_color=bar_colors
+        ))
+        fig_nights.update_layout(title_text='Nights by Country',
+                                 xaxis_title='Country', yaxis_title='Number of Nights',
+                                 showlegend=False)
         st.plotly_chart(fig_nights, use_container_width=True)
     with col2:
-        fig_cost = px.bar(
-            grouped_df,
-            x='Country',
-            y='Total Cost (€)',
-            title='Total Cost by Country',
-            labels={'Total Cost (€)': 'Cost (€)'},
-            color='Country'
-        )
-        fig_cost.update_layout(showlegend=False)
+        fig_cost = go.Figure(go.Bar(
+            x=countries_x,
+            y=grouped_df['Total Cost (€)'].to_numpy(),
+            marker_color=bar_colors
+        ))
+        fig_cost.update_layout(title_text='Total Cost by Country',
+                               xaxis_title='Country', yaxis_title='Cost (€)',
+                               showlegend=False)
         st.plotly_chart(fig_cost, use_container_width=True)
 
-def create_cost_visualization(df: pd.DataFrame) -> None:
+def create_cost_visualization(df: pd.DataFrame, resolved: Dict[str, Any]) -> None:
     """Create accommodation cost visualizations"""
-    cost_columns = ['total price of stay', 'cost', 'price', 'amount', 'total_cost', 'expense']
-    cost_col = next((col for col in cost_columns if col in df.columns), None)
+    import plotly.express as px  # deferred: skipped entirely on no-data paths
+    cost_col = resolved['cost']
     if not cost_col:
         st.warning("No accommodation cost data found in the dataset")
         return
     col1, col2 = st.columns(2)
     with col1:
-        fig_hist = px.histogram(
-            df,
-            x=cost_col,
-            title="Distribution of Accommodation Costs",
-            nbins=20,
-            labels={'x': 'Cost (€)', 'y': 'Number of Stays'}
-        )
-        fig_hist.update_layout(showlegend=False)
-        st.plotly_chart(fig_hist, use_container_width=True)
+        # Bin server-side: the browser payload is 20 bar heights instead
+        # of every raw cost value re-binned by plotly.js on each render
+        costs = df[cost_col].to_numpy(dtype='float64')
+        costs = costs[~np.isnan(costs)]
+        if len(costs):
+            counts, edges = np.histogram(costs, bins=20)
+            fig_hist = go.Figure(go.Bar(
+                x=(edges[:-1] + edges[1:]) / 2,
+                y=counts,
+                width=np.diff(edges)
+            ))
+            fig_hist.update_layout(title_text="Distribution of Accommodation Costs",
+                                   xaxis_title='Cost (€)', yaxis_title='Number of Stays',
+                                   bargap=0, showlegend=False)
+            st.plotly_chart(fig_hist, use_container_width=True)
     with col2:
-        date_columns = ['check in', 'check out', 'date', 'departure_date', 'arrival_date', 'booking_date', 'travel_date']
-        date_col = next((col for col in date_columns if col in df.columns), None)
+        date_col = resolved['date']
         if date_col:
             df_time = df.dropna(subset=[date_col, cost_col])
             if not df_time.empty:
+                # Chronologically entered data is usually already sorted;
+                # check monotonicity (O(n)) before paying for a sort
+                if not df_time[date_col].is_monotonic_increasing:
+                    df_time = df_time.sort_values(date_col, kind='stable')
                 fig_time = px.line(
-                    df_time.sort_values(date_col),
+                    df_time,
                     x=date_col,
                     y=cost_col,
                     title="Accommodation Costs Over Time",
@@ -332,8 +507,7 @@ def create_cost_visualization(df: pd.DataFrame) -> None:
                 )
                 st.plotly_chart(fig_time, use_container_width=True)
             else:
-                type_columns = ['platform', 'travel_type', 'type', 'category', 'mode']
-                type_col = next((col for col in type_columns if col in df.columns), None)
+                type_col = resolved['type']
                 if type_col:
                     fig_box = px.box(
                         df,
@@ -344,23 +518,48 @@ def create_cost_visualization(df: pd.DataFrame) -> None:
                     )
                     st.plotly_chart(fig_box, use_container_width=True)
 
+@st.cache_data(show_spinner=False)
+def _nights_by_country(df: pd.DataFrame) -> pd.Series:
+    """Cached prep for the destination pie: nights summed per country.
+
+    When country is categorical the sum runs as one bincount pass over
+    the codes and the top 10 comes from argpartition instead of a full
+    sort; otherwise falls back to a plain groupby.
+    """
+    if not isinstance(df['country'].dtype, pd.CategoricalDtype):
+        return df.groupby("country", observed=True, sort=False)["nights"].sum().nlargest(10)
+    codes = df['country'].cat.codes.to_numpy()
+    nights = pd.to_numeric(df['nights'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    valid = codes >= 0
+    totals = np.bincount(codes[valid], weights=nights[valid],
+                         minlength=len(df['country'].cat.categories))
+    observed = np.unique(codes[valid])
+    totals = totals[observed]
+    names = df['country'].cat.categories.to_numpy()[observed]
+    k = min(10, len(totals))
+    if len(totals) > k:
+        top = np.argpartition(-totals, k - 1)[:k]
+    else:
+        top = np.arange(len(totals))
+    top = top[np.argsort(-totals[top], kind='stable')]
+    return pd.Series(totals[top], index=names[top], name='nights')
+
 def create_destination_visualization(df: pd.DataFrame) -> None:
     """Pie chart: Top 10 countries by nights spent"""
     if "country" not in df.columns or "nights" not in df.columns:
         st.warning("Dataset must have 'country' and 'nights' columns")
         return
-    country_nights = df.groupby("country")["nights"].sum().nlargest(10)
-    fig_pie = px.pie(
-        values=country_nights.values,
-        names=country_nights.index,
-        title="🌍 Top 10 Countries by Nights Spent"
-    )
+    country_nights = _nights_by_country(df)
+    fig_pie = go.Figure(go.Pie(
+        labels=np.asarray(country_nights.index),
+        values=country_nights.to_numpy()
+    ))
+    fig_pie.update_layout(title_text="🌍 Top 10 Countries by Nights Spent")
     st.plotly_chart(fig_pie, use_container_width=True)
 
-def create_accommodation_patterns_visualization(df: pd.DataFrame) -> None:
+def create_accommodation_patterns_visualization(df: pd.DataFrame, resolved: Dict[str, Any]) -> None:
     """Create accommodation booking pattern visualizations"""
-    date_columns = ['check in', 'check out', 'date', 'departure_date', 'arrival_date', 'booking_date', 'travel_date']
-    date_col = next((col for col in date_columns if col in df.columns), None)
+    date_col = resolved['date']
     if not date_col:
         st.warning("No date data found for accommodation patterns analysis")
         return
@@ -370,51 +569,55 @@ def create_accommodation_patterns_visualization(df: pd.DataFrame) -> None:
         return
     col1, col2 = st.columns(2)
     with col1:
-        df_clean['month'] = df_clean[date_col].dt.month_name()
-        monthly_counts = df_clean['month'].value_counts()
-        month_order = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
-        monthly_counts = monthly_counts.reindex([m for m in month_order if m in monthly_counts.index])
-        fig_monthly = px.bar(
-            x=monthly_counts.index,
-            y=monthly_counts.values,
-            title="Accommodation Bookings by Month",
-            labels={'x': 'Month', 'y': 'Number of Stays'}
-        )
+        if '_month' in df_clean.columns:
+            month_names = df_clean['_month']
+        else:
+            month_names = pd.Categorical(df_clean[date_col].dt.month_name(),
+                                         categories=MONTH_ORDER, ordered=True)
+        # Already in calendar order thanks to the ordered categories
+        monthly_counts = pd.Series(month_names).value_counts(sort=False)
+        monthly_counts = monthly_counts[monthly_counts > 0]
+        fig_monthly = go.Figure(go.Bar(
+            x=monthly_counts.index.astype(str).to_numpy(),
+            y=monthly_counts.to_numpy()
+        ))
+        fig_monthly.update_layout(title_text="Accommodation Bookings by Month",
+                                  xaxis_title='Month', yaxis_title='Number of Stays')
         st.plotly_chart(fig_monthly, use_container_width=True)
     with col2:
-        df_clean['day_of_week'] = df_clean[date_col].dt.day_name()
-        dow_counts = df_clean['day_of_week'].value_counts()
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        dow_counts = dow_counts.reindex([d for d in day_order if d in dow_counts.index])
-        fig_dow = px.bar(
-            x=dow_counts.index,
-            y=dow_counts.values,
-            title="Check-in Frequency by Day of Week",
-            labels={'x': 'Day of Week', 'y': 'Number of Stays'}
-        )
+        if '_dow' in df_clean.columns:
+            day_names = df_clean['_dow']
+        else:
+            day_names = pd.Categorical(df_clean[date_col].dt.day_name(),
+                                       categories=DAY_ORDER, ordered=True)
+        dow_counts = pd.Series(day_names).value_counts(sort=False)
+        dow_counts = dow_counts[dow_counts > 0]
+        fig_dow = go.Figure(go.Bar(
+            x=dow_counts.index.astype(str).to_numpy(),
+            y=dow_counts.to_numpy()
+        ))
+        fig_dow.update_layout(title_text="Check-in Frequency by Day of Week",
+                              xaxis_title='Day of Week', yaxis_title='Number of Stays')
         st.plotly_chart(fig_dow, use_container_width=True)
 
 
 
 
-def create_workaway_visualization(df: pd.DataFrame, id_ascending: bool = True):
-    """
-    Streamlit visualization for Workaway rows.
-    - Filters platform == 'workaway'
-    - Sorts rows by ID (if present, case-insensitive)
-    - Groups by ['country', 'accommodation'] and sums 'nights'
-    - Adds a summary row at the end with total nights
-    """
-    required = {"platform", "nights", "country", "accommodation"}
-    missing = required - set(map(str, df.columns))
-    if missing:
-        st.error(f"DataFrame missing required columns: {', '.join(missing)}")
-        return
-
-    workaway_df = df[df['platform'].astype(str).str.lower() == 'workaway'].copy()
+@st.cache_data(show_spinner=False)
+def _workaway_summary(df: pd.DataFrame, id_ascending: bool) -> pd.DataFrame:
+    """Cached prep for the Workaway table: filter, sort by id, group, total row"""
+    platform = df['platform']
+    if isinstance(platform.dtype, pd.CategoricalDtype):
+        # Lowercase only the small categories array, then match rows on codes
+        lower_cats = platform.cat.categories.astype(str).str.lower()
+        workaway_codes = np.flatnonzero(lower_cats == 'workaway')
+        mask = np.isin(platform.cat.codes.to_numpy(), workaway_codes)
+    else:
+        mask = platform.astype(str).str.lower() == 'workaway'
+    # The mask slice is already a fresh frame; no extra copy needed
+    workaway_df = df[mask]
     if workaway_df.empty:
-        st.warning("No Workaway data found in dataframe.")
-        return
+        return workaway_df
 
     # detect ID column case-insensitive
     id_col = next((c for c in workaway_df.columns if str(c).lower() == 'id'), None)
@@ -427,7 +630,7 @@ def create_workaway_visualization(df: pd.DataFrame, id_ascending: bool = True):
 
     grouped = (
         workaway_df
-        .groupby(['country', 'accommodation'], sort=False, as_index=False)
+        .groupby(['country', 'accommodation'], sort=False, observed=True, as_index=False)
         .agg(total_nights=('nights', 'sum'))
     )
 
@@ -438,7 +641,26 @@ def create_workaway_visualization(df: pd.DataFrame, id_ascending: bool = True):
         "accommodation": [""],
         "total_nights": [total_nights_all]
     })
-    grouped = pd.concat([grouped, summary_row], ignore_index=True)
+    return pd.concat([grouped, summary_row], ignore_index=True)
+
+def create_workaway_visualization(df: pd.DataFrame, id_ascending: bool = True):
+    """
+    Streamlit visualization for Workaway rows.
+    - Filters platform == 'workaway'
+    - Sorts rows by ID (if present, case-insensitive)
+    - Groups by ['country', 'accommodation'] and sums 'nights'
+    - Adds a summary row at the end with total nights
+    """
+    required = {"platform", "nights", "country", "accommodation"}
+    missing = required - set(map(str, df.columns))
+    if missing:
+        st.error(f"DataFrame missing required columns: {', '.join(missing)}")
+        return
+
+    grouped = _workaway_summary(df, id_ascending)
+    if grouped.empty:
+        st.warning("No Workaway data found in dataframe.")
+        return
 
     # display
     st.subheader("🌞 Workaway Summary by Accommodation (sorted by ID)")
@@ -453,6 +675,26 @@ def create_workaway_visualization(df: pd.DataFrame, id_ascending: bool = True):
 
 
 
+@st.fragment
+def _raw_data_section(df: pd.DataFrame) -> None:
+    """Raw-data table plus download button.
+
+    Runs as a fragment so interactions inside this block rerun only the
+    block itself, and the full-frame Arrow serialization for the table
+    stays out of the main rerun path.
+    """
+    st.header("📋 Raw Data")
+    # Keep the precomputed underscore helper columns out of the raw view
+    display_cols = [col for col in df.columns if not col.startswith('_')]
+    st.dataframe(df[display_cols], use_container_width=True)
+    csv_data = prepare_csv_download(df[display_cols])
+    st.download_button(
+        label="Download Filtered Data as CSV",
+        data=csv_data,
+        file_name=f"filtered_accommodation_data_{datetime.now().strftime('%Y%m%d')}.csv.gz",
+        mime="application/gzip"
+    )
+
 def main() -> None:
     """Main application function"""
     st.title("🏨 Tam Vonku Dashboard")
@@ -462,8 +704,8 @@ def main() -> None:
         st.warning("No data available. Please ensure travel_data.csv exists and contains valid accommodation data.")
         st.stop()
     st.sidebar.header("🔍 Filters")
-    date_columns = ['check in', 'check out', 'date', 'departure_date', 'arrival_date', 'booking_date', 'travel_date']
-    date_col = next((col for col in date_columns if col in df.columns), None)
+    resolved = resolve_columns(df)
+    date_col = resolved['date']
     if date_col:
         df_clean_dates = df.dropna(subset=[date_col])
         if not df_clean_dates.empty:
@@ -475,23 +717,27 @@ def main() -> None:
                 min_value=min_date,
                 max_value=max_date
             )
-            if len(selected_dates) == 2:
+            # The default range spans everything - only filter when the
+            # user actually narrowed it
+            if len(selected_dates) == 2 and tuple(selected_dates) != (min_date, max_date):
                 start_date, end_date = selected_dates
-                df = df[(df[date_col].dt.date >= start_date) & (df[date_col].dt.date <= end_date)]
+                df = filter_frame(df, date_col, start_date, end_date, ())
     st.sidebar.header("🔍 Filter by Country")
     if "country" in df.columns:
-        countries = df["country"].dropna().unique()
+        countries = _unique_options(df, "country")
         selected_countries = st.sidebar.multiselect(
             "Select Country(s)",
-            options=sorted(countries),
-            default=sorted(countries)
+            options=countries,
+            default=countries
         )
-        if selected_countries:
-            df = df[df["country"].isin(selected_countries)]
+        # With the default everything-selected state the filter is a no-op;
+        # skip the scan and the copy it would allocate
+        if selected_countries and len(selected_countries) != len(countries):
+            df = filter_frame(df, None, None, None, tuple(selected_countries))
     else:
         st.sidebar.warning("No 'country' column found in the dataset.")
     st.header("📊 Summary Statistics")
-    metrics = create_summary_metrics(df)
+    metrics = create_summary_metrics(df, resolved)
     if metrics:
         if 'days_on_road' in metrics:
             st.metric("🗓️ Days on the Road", f"{metrics['days_on_road']:,} days", help="Total duration from first check-in to last check-out")
@@ -530,21 +776,13 @@ def main() -> None:
         #st.write("Top 5 Location/Platform Combinations by Nights:")
         #st.pyplot(fig)
         
-        st.header("📋 Raw Data")
-        st.dataframe(df, use_container_width=True)
-        csv_data = df.to_csv(index=False)
-        st.download_button(
-            label="Download Filtered Data as CSV",
-            data=csv_data,
-            file_name=f"filtered_accommodation_data_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+        _raw_data_section(df)
     else:
         st.warning("No data matches the selected filters.")
 
 data = pd.read_csv("travel_data.csv")
 
-location_platform_nights = data.groupby(['location', 'platform'])['nights'].sum()
+location_platform_nights = data.groupby(['location', 'platform'], observed=True, sort=False)['nights'].sum()
 
 top_5_combinations = location_platform_nights.sort_values(ascending=False).head(5)
 
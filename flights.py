@@ -2,25 +2,38 @@
 import streamlit as st
 import pandas as pd
 
-@st.cache_data
+@st.cache_resource
 def load_transport_data() -> pd.DataFrame:
-    """Load and cache transport data from CSV"""
+    """Load and cache transport data from CSV.
+
+    cache_resource returns the parsed frame by reference instead of
+    pickling a copy out of the cache on every rerun; callers must not
+    mutate it (the flight section only filters, which allocates new
+    frames).
+    """
     try:
-        df = pd.read_csv("data_transport.csv")
-
-        # Clean price column (spaces + commas)
-        if 'price per person ( EUR )' in df.columns:
-            df['price per person ( EUR )'] = (
-                df['price per person ( EUR )']
-                .astype(str)
-                .str.replace(" ", "")
-                .str.replace(",", ".")
-                .astype(float)
-            )
+        # Declare the schema up front: only the columns the dashboard
+        # touches, string dtypes for the text fields, and decimal/thousands
+        # args so the C parser emits the price column as float directly
+        df = pd.read_csv(
+            "data_transport.csv",
+            usecols=['date', 'from', 'to', 'type of transport', 'price per person ( EUR )'],
+            dtype={'from': 'category', 'to': 'category', 'type of transport': 'string'},
+            thousands=' ', decimal=',',
+        )
 
-        # Convert date
+        # Convert date: rewrite DD.MM.YYYY to ISO first so pandas takes its
+        # fast vectorized parse path instead of per-element format inference
         if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+            iso_dates = df['date'].astype('string').str.replace(
+                r'^(\d{2})\.(\d{2})\.(\d{4})$', r'\3-\2-\1', regex=True
+            )
+            df['date'] = pd.to_datetime(iso_dates, format='%Y-%m-%d', errors='coerce')
+
+        # Normalize case once here; with category codes the flight filter
+        # becomes an integer compare with no per-rerun lowercasing
+        if 'type of transport' in df.columns:
+            df['type of transport'] = df['type of transport'].str.lower().astype('category')
 
         return df
     except Exception as e:
@@ -33,8 +46,8 @@ def create_flight_metrics(df: pd.DataFrame) -> None:
         st.warning("No transport data available.")
         return
 
-    # Filter flightss
-    flight_df = df[df['type of transport'].str.lower() == "flight"]
+    # Filter flights (the loader already lower-cased the column)
+    flight_df = df[df['type of transport'] == "flight"]
 
     if flight_df.empty:
         st.info("No flight records found in transport data.")
@@ -45,10 +58,11 @@ def create_flight_metrics(df: pd.DataFrame) -> None:
 
     # --- Table: flights from-to-price
     st.write("### ✈️ Flight Details")
-    #st.dataframe(flight_df[['from', 'to', 'price per person ( EUR )']], use_container_width=True)
+    # hide_index renders a clean table without the reset_index reallocation
     st.dataframe(
-        flight_df[['from', 'to', 'price per person ( EUR )']].copy().reset_index(drop=True),
-        use_container_width=True
+        flight_df[['from', 'to', 'price per person ( EUR )']],
+        use_container_width=True,
+        hide_index=True
     )
 
 